@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""Drive a realistic request mix against src.main:app on the local machine.
+
+The app runs under uvicorn in a subprocess listening on a Unix socket, so
+requests go through the real web tier (HTTP parsing included) without any
+network service. Spec sizes are drawn from a log-normal distribution and the
+report covers throughput, p50/p99/p999 latency per route, peak requests in
+flight and the server's RSS over time:
+
+    python -m benchmarks.loadtest --requests 5000 --concurrency 16
+    python -m benchmarks.loadtest --requests 5000 --record traffic.jsonl
+    python -m benchmarks.loadtest --replay traffic.jsonl --speed 1
+    python benchmarks/loadtest.py --replay traffic.jsonl
+
+Replay logs are JSON lines, one request each:
+
+    {"offset": 0.01, "method": "POST", "path": "/canvas", "body_size": 20000, "id": "<canvas id>"}
+
+`body` (text) is sent verbatim when present, otherwise a spec of `body_size`
+bytes is generated. `headers` is passed through. `id` on a create maps the
+recorded canvas ID to the live one, so later paths that use it hit the right
+canvas; requests for that ID wait for the create to finish. `offset` (seconds
+from the start, taken when the request was sent) is honoured when `--speed`
+is set.
+"""
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import cbor2
+import click
+import httpx
+import msgpack
+import yaml
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ROUTES = ("create", "update", "get", "list", "delete")
+DEFAULT_MIX = "create=2,update=2,get=5,list=1,delete=1"
+CANVAS_ID_PATH = re.compile(r"^/canvas/([^/?]+)")
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+CBOR_MEDIA_TYPE = "application/cbor"
+
+# uvicorn closes idle keep-alive connections after this many seconds. The
+# client expires pooled connections sooner, so it never reuses one the server
+# is closing while a slow request on another connection is still running.
+SERVER_KEEPALIVE = 120
+CLIENT_KEEPALIVE = 60
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Parse a `route=weight,...` request mix."""
+    mix = {}
+    for item in value.split(","):
+        route, _, weight = item.partition("=")
+        route = route.strip()
+        if route not in ROUTES:
+            raise ValueError(f"Unknown route in mix: {route}")
+        mix[route] = float(weight)
+    if not any(mix.values()):
+        raise ValueError("Request mix needs at least one non-zero weight")
+    return mix
+
+
+def route_label(method: str, path: str) -> str:
+    """Collapse a concrete request path into its route template."""
+    path = path.split("?", 1)[0]
+    if CANVAS_ID_PATH.match(path):
+        path = "/canvas/{id}"
+    return f"{method.upper()} {path}"
+
+
+def make_spec(target_bytes: int, rng: random.Random) -> Dict[str, Any]:
+    """Build a canvas spec whose YAML encoding is roughly `target_bytes` long."""
+    def make_object(i):
+        if rng.random() < 0.5:
+            return {"type": "Rect", "attrs": {
+                "x": rng.randint(0, 800), "y": rng.randint(0, 600),
+                "width": rng.randint(10, 200), "height": rng.randint(10, 200),
+                "fill": f"#{rng.randrange(0x1000000):06x}", "name": f"rect-{i}"}}
+        return {"type": "Circle", "attrs": {
+            "x": rng.randint(0, 800), "y": rng.randint(0, 600),
+            "radius": rng.randint(5, 100),
+            "fill": f"#{rng.randrange(0x1000000):06x}", "name": f"circle-{i}"}}
+
+    object_size = len(yaml.dump(make_object(0)))
+    count = max(1, target_bytes // object_size)
+    per_layer = 500
+    layers = [
+        {"name": f"layer-{n}", "objects": [make_object(i) for i in range(start, min(start + per_layer, count))]}
+        for n, start in enumerate(range(0, count, per_layer))
+    ]
+    return {"stage": {"width": 800, "height": 600}, "layers": layers}
+
+
+def build_body_pool(rng: random.Random, count: int, median: int, sigma: float, max_size: int) -> List[bytes]:
+    """Pre-encode YAML request bodies with log-normally distributed sizes.
+
+    Encoding happens up front so client-side YAML dumping doesn't slow
+    down the request loop.
+    """
+    pool = []
+    for _ in range(count):
+        size = min(max_size, int(rng.lognormvariate(math.log(median), sigma)))
+        pool.append(yaml.dump(make_spec(size, rng)).encode())
+    return pool
+
+
+def read_rss(pid: int) -> int:
+    """Current resident set size of process `pid` in bytes (Linux only)."""
+    with open(f"/proc/{pid}/statm", "r") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted samples."""
+    if not sorted_samples:
+        return float("nan")
+    # Round first so float error cannot push the rank up by one
+    rank = max(1, math.ceil(round(pct * len(sorted_samples) / 100, 9)))
+    return sorted_samples[rank - 1]
+
+
+class LoadStats:
+    """Latency, status and RSS samples collected during a run."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.rss: List[tuple] = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    def record(self, label: str, latency: float, status: int) -> None:
+        """Record one request; status 0 stands for a transport error."""
+        self.latencies.setdefault(label, []).append(latency)
+        if status == 0 or status >= 400:
+            self.errors[label] = self.errors.get(label, 0) + 1
+
+    def sample_rss(self, pid: int, interval: float, stop: threading.Event) -> None:
+        """Append an (elapsed, rss) sample of `pid` every `interval` seconds until `stop` is set.
+
+        Runs in a thread so the cadence holds even while the event loop is busy.
+        """
+        while not stop.is_set():
+            self.rss.append((self.elapsed, read_rss(pid)))
+            stop.wait(interval)
+
+    def summary(self) -> Dict[str, Any]:
+        total = sum(len(samples) for samples in self.latencies.values())
+        routes = {}
+        for label, samples in sorted(self.latencies.items()):
+            ordered = sorted(samples)
+            routes[label] = {
+                "count": len(ordered),
+                "errors": self.errors.get(label, 0),
+                "p50_ms": percentile(ordered, 50) * 1000,
+                "p99_ms": percentile(ordered, 99) * 1000,
+                "p999_ms": percentile(ordered, 99.9) * 1000,
+                "max_ms": ordered[-1] * 1000,
+            }
+        return {
+            "requests": total,
+            "elapsed_s": self.elapsed,
+            "throughput_rps": total / self.elapsed if self.elapsed else 0.0,
+            "peak_in_flight": self.peak_in_flight,
+            "routes": routes,
+            "rss": [{"t_s": t, "rss_bytes": rss} for t, rss in self.rss],
+        }
+
+
+async def send(client: httpx.AsyncClient, stats: LoadStats, method: str, path: str,
+               body: Optional[bytes] = None, headers: Optional[Dict[str, str]] = None) -> Optional[httpx.Response]:
+    """Issue one request and record its latency under its route template.
+
+    Transport errors (e.g. a reset connection) are counted as errors for the
+    route and return None, so one bad request doesn't end the run.
+    """
+    stats.in_flight += 1
+    stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, path, content=body, headers=headers)
+    except httpx.TransportError:
+        response = None
+    finally:
+        stats.in_flight -= 1
+    status = response.status_code if response is not None else 0
+    stats.record(route_label(method, path), time.perf_counter() - start, status)
+    return response
+
+
+def response_payload(response: httpx.Response) -> Any:
+    """Decode a JSON, MessagePack or CBOR response body."""
+    content_type = response.headers.get("content-type", "").split(";", 1)[0].strip().lower()
+    if content_type in MSGPACK_MEDIA_TYPES:
+        return msgpack.unpackb(response.content, raw=False)
+    if content_type == CBOR_MEDIA_TYPE:
+        return cbor2.loads(response.content)
+    return response.json()
+
+
+class LocalServer:
+    """uvicorn serving src.main:app on a Unix socket in a subprocess."""
+
+    def __init__(self, timeout: float = 30.0):
+        self.timeout = timeout
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmpdir.name, "konva.sock")
+        self.process: Optional[subprocess.Popen] = None
+
+    def client(self) -> httpx.AsyncClient:
+        """An httpx client connected to the server's socket."""
+        transport = httpx.AsyncHTTPTransport(
+            uds=self.socket_path, limits=httpx.Limits(keepalive_expiry=CLIENT_KEEPALIVE))
+        # Large specs can take a while; latency is measured, never cut short
+        return httpx.AsyncClient(transport=transport, base_url="http://konva", timeout=None)
+
+    async def __aenter__(self) -> "LocalServer":
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "src.main:app", "--uds", self.socket_path,
+             "--timeout-keep-alive", str(SERVER_KEEPALIVE), "--log-level", "warning"],
+            cwd=ROOT,
+        )
+        deadline = time.perf_counter() + self.timeout
+        async with self.client() as client:
+            while True:
+                try:
+                    if (await client.get("/health")).status_code == 200:
+                        return self
+                except httpx.TransportError:
+                    pass
+                if self.process.poll() is not None or time.perf_counter() > deadline:
+                    await self.__aexit__(None, None, None)
+                    raise RuntimeError("uvicorn did not start serving src.main:app")
+                await asyncio.sleep(0.05)
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait()
+        self.tmpdir.cleanup()
+
+
+async def run_synthetic(client: httpx.AsyncClient, total: Optional[int], duration: Optional[float], concurrency: int, mix: Dict[str, float],
+                        bodies: List[bytes], rng: random.Random, echo: bool,
+                        stats: LoadStats, log: Optional[List[Dict[str, Any]]] = None) -> None:
+    """Run `concurrency` workers issuing a weighted mix until `total` requests or `duration` seconds.
+
+    `total=None` means no request limit, so only `duration` stops the run.
+    """
+    routes, weights = zip(*mix.items())
+    live_ids: List[str] = []
+    busy: Dict[str, int] = {}
+    issued = 0
+    query = "" if echo else "?echo=false"
+    yaml_headers = {"Content-Type": "application/yaml"}
+
+    def remember(method, path, body=None):
+        # Logged when the request is sent, so offsets are comparable across routes
+        entry = {"offset": stats.elapsed, "method": method, "path": path}
+        if body is not None:
+            entry.update(body_size=len(body), headers=yaml_headers)
+        if log is not None:
+            log.append(entry)
+        return entry
+
+    async def on_canvas(method, canvas_id, body=None, suffix=""):
+        # Track in-flight requests per canvas so deletes never race them
+        busy[canvas_id] = busy.get(canvas_id, 0) + 1
+        try:
+            path = f"/canvas/{canvas_id}{suffix}"
+            remember(method, path, body)
+            await send(client, stats, method, path, body, yaml_headers if body is not None else None)
+        finally:
+            busy[canvas_id] -= 1
+            if not busy[canvas_id]:
+                del busy[canvas_id]
+
+    async def worker():
+        nonlocal issued
+        while (total is None or issued < total) and (duration is None or stats.elapsed < duration):
+            issued += 1
+            route = rng.choices(routes, weights)[0]
+            idle_ids = [canvas_id for canvas_id in live_ids if canvas_id not in busy]
+            if (route in ("update", "get") and not live_ids) or (route == "delete" and not idle_ids):
+                route = "create"
+            if route == "create":
+                body = rng.choice(bodies)
+                path = f"/canvas{query}"
+                entry = remember("POST", path, body)
+                response = await send(client, stats, "POST", path, body, yaml_headers)
+                if response is not None and response.status_code == 200:
+                    entry["id"] = response_payload(response)["id"]
+                    live_ids.append(entry["id"])
+            elif route == "update":
+                await on_canvas("PUT", rng.choice(live_ids), rng.choice(bodies), query)
+            elif route == "get":
+                await on_canvas("GET", rng.choice(live_ids))
+            elif route == "list":
+                remember("GET", "/canvas")
+                await send(client, stats, "GET", "/canvas")
+            else:
+                # Drop the ID before awaiting so no other worker picks it
+                canvas_id = rng.choice(idle_ids)
+                live_ids.remove(canvas_id)
+                await on_canvas("DELETE", canvas_id)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+def load_replay_log(path: str) -> List[Dict[str, Any]]:
+    """Read a JSON lines request log, skipping blank lines."""
+    with open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def run_replay(client: httpx.AsyncClient, entries: List[Dict[str, Any]], concurrency: int, speed: float,
+                     rng: random.Random, stats: LoadStats) -> None:
+    """Replay logged requests, paced by their offsets when `speed` is non-zero."""
+    id_map: Dict[str, str] = {}
+    pending = {entry["id"]: asyncio.Event() for entry in entries if "id" in entry}
+    generated: Dict[int, bytes] = {}
+    limit = asyncio.Semaphore(concurrency)
+
+    def body_for(entry):
+        if "body" in entry:
+            return entry["body"].encode()
+        size = entry.get("body_size")
+        if not size:
+            return None
+        if size not in generated:
+            generated[size] = yaml.dump(make_spec(size, rng)).encode()
+        return generated[size]
+
+    async def replay(entry):
+        match = CANVAS_ID_PATH.match(entry["path"])
+        if match and match.group(1) in pending and "id" not in entry:
+            # Wait for the create that produces this canvas to be mapped
+            await pending[match.group(1)].wait()
+        async with limit:
+            path = CANVAS_ID_PATH.sub(lambda m: f"/canvas/{id_map.get(m.group(1), m.group(1))}", entry["path"])
+            try:
+                response = await send(client, stats, entry["method"], path, body_for(entry), entry.get("headers"))
+                if "id" in entry and response is not None and response.status_code == 200:
+                    id_map[entry["id"]] = response_payload(response).get("id", entry["id"])
+            finally:
+                if "id" in entry:
+                    pending[entry["id"]].set()
+
+    if not speed:
+        # Start everything in log order; the semaphore caps requests in flight
+        await asyncio.gather(*(replay(entry) for entry in entries))
+        return
+    tasks = []
+    for entry in entries:
+        delay = entry.get("offset", 0) / speed - stats.elapsed
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(replay(entry)))
+    await asyncio.gather(*tasks)
+
+
+def print_report(summary: Dict[str, Any], rss_rows: int = 10) -> None:
+    click.echo(f"requests   {summary['requests']}")
+    click.echo(f"elapsed    {summary['elapsed_s']:.2f} s")
+    click.echo(f"throughput {summary['throughput_rps']:.1f} req/s")
+    click.echo(f"in flight  {summary['peak_in_flight']} peak")
+    click.echo("")
+    click.echo(f"{'route':<22} {'count':>7} {'errors':>7} {'p50 ms':>9} {'p99 ms':>9} {'p999 ms':>9} {'max ms':>9}")
+    for label, route in summary["routes"].items():
+        click.echo(
+            f"{label:<22} {route['count']:>7} {route['errors']:>7} {route['p50_ms']:>9.2f} "
+            f"{route['p99_ms']:>9.2f} {route['p999_ms']:>9.2f} {route['max_ms']:>9.2f}"
+        )
+    rss = summary["rss"]
+    if rss:
+        click.echo("")
+        click.echo(f"{'t s':>8} {'server rss MB':>14}")
+        step = max(1, math.ceil(len(rss) / rss_rows))
+        for sample in rss[::step] + ([rss[-1]] if (len(rss) - 1) % step else []):
+            click.echo(f"{sample['t_s']:>8.2f} {sample['rss_bytes'] / 2**20:>14.1f}")
+        peak = max(sample["rss_bytes"] for sample in rss)
+        click.echo(f"peak server RSS {peak / 2**20:.1f} MB")
+
+
+@click.command()
+@click.option('--requests', 'total', type=int,
+              help='Total requests in synthetic mode [default: 1000, unbounded with --duration].')
+@click.option('--duration', type=float, help='Stop synthetic mode after this many seconds.')
+@click.option('--concurrency', default=8, show_default=True, help='Requests in flight at once.')
+@click.option('--mix', default=DEFAULT_MIX, show_default=True, help='Relative weights of create/update/get/list/delete.')
+@click.option('--size-median', default=10000, show_default=True, help='Median spec size in bytes.')
+@click.option('--size-sigma', default=1.0, show_default=True, help='Log-normal sigma of spec sizes.')
+@click.option('--size-max', default=5_000_000, show_default=True, help='Largest spec size in bytes.')
+@click.option('--pool', default=32, show_default=True, help='Number of distinct pre-generated specs.')
+@click.option('--echo/--no-echo', default=True, show_default=True, help='Ask create/update to echo data back.')
+@click.option('--seed', default=0, show_default=True, help='Random seed, for reproducible runs.')
+@click.option('--rss-interval', default=0.1, show_default=True, help='Seconds between RSS samples.')
+@click.option('--record', type=click.Path(), help='Write the synthetic traffic as a replay log.')
+@click.option('--replay', type=click.Path(exists=True), help='Replay a JSON lines request log instead.')
+@click.option('--speed', default=0.0, show_default=True, help='Replay pacing factor; 0 replays as fast as possible.')
+@click.option('--json-output', type=click.Path(), help='Also write the full results as JSON.')
+def main(total, duration, concurrency, mix, size_median, size_sigma, size_max, pool, echo, seed,
+         rss_interval, record, replay, speed, json_output):
+    """Load-test the Konva API against a local uvicorn server."""
+    if total is None and duration is None:
+        total = 1000
+    rng = random.Random(seed)
+    if replay:
+        entries = load_replay_log(replay)
+    else:
+        try:
+            weights = parse_mix(mix)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint='--mix')
+        bodies = build_body_pool(rng, pool, size_median, size_sigma, size_max)
+    log = [] if record else None
+
+    async def run():
+        async with LocalServer() as server, server.client() as client:
+            pid = server.process.pid
+            stats = LoadStats()
+            stop = threading.Event()
+            sampler = threading.Thread(target=stats.sample_rss, args=(pid, rss_interval, stop), daemon=True)
+            sampler.start()
+            try:
+                if replay:
+                    await run_replay(client, entries, concurrency, speed, rng, stats)
+                else:
+                    await run_synthetic(client, total, duration, concurrency, weights, bodies, rng, echo, stats, log)
+            finally:
+                stats.finished = time.perf_counter()
+                stop.set()
+                sampler.join()
+                stats.rss.append((stats.elapsed, read_rss(pid)))
+        return stats
+
+    summary = asyncio.run(run()).summary()
+    print_report(summary)
+    if record:
+        with open(record, "w") as f:
+            f.writelines(json.dumps(entry) + "\n" for entry in log)
+    if json_output:
+        with open(json_output, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
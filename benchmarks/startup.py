@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Measure server cold start: import of src.main and time to the first 200 response.
+
+Each run starts a fresh interpreter so nothing is shared between runs:
+
+    python benchmarks/startup.py --runs 10
+"""
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+import click
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import src.main; "
+    "print(time.perf_counter() - t)"
+)
+
+
+def free_port() -> int:
+    """Ask the OS for an unused local port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_import() -> float:
+    """Time `import src.main` in a fresh interpreter."""
+    output = subprocess.check_output([sys.executable, "-c", IMPORT_SNIPPET], cwd=ROOT)
+    return float(output.decode().strip().splitlines()[-1])
+
+
+def wait_for_200(url: str, deadline: float) -> None:
+    """Poll a URL until it answers 200 or the deadline passes."""
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.005)
+    raise TimeoutError(f"No 200 response from {url}")
+
+
+def measure_ready(path: str, timeout: float) -> float:
+    """Time from spawning uvicorn to the first 200 response on `path`."""
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+    )
+    try:
+        wait_for_200(f"http://127.0.0.1:{port}{path}", start + timeout)
+        return time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def summarize(label: str, samples) -> None:
+    ms = [s * 1000 for s in samples]
+    click.echo(
+        f"{label:<24} min {min(ms):8.1f} ms  median {statistics.median(ms):8.1f} ms  max {max(ms):8.1f} ms"
+    )
+
+
+@click.command()
+@click.option('--runs', default=5, show_default=True, help='Number of cold starts per measurement.')
+@click.option('--timeout', default=30.0, show_default=True, help='Seconds to wait for the server to answer.')
+def main(runs, timeout):
+    """Benchmark server cold start."""
+    summarize("import src.main", [measure_import() for _ in range(runs)])
+    summarize("first 200 /health", [measure_ready("/health", timeout) for _ in range(runs)])
+    summarize("first 200 /openapi.json", [measure_ready("/openapi.json", timeout) for _ in range(runs)])
+
+
+if __name__ == '__main__':
+    main()
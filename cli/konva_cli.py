@@ -4,64 +4,111 @@ import sys
 import yaml
 import json
 import click
+from datetime import timezone
+from functools import partial
 import requests
+import msgpack
+import cbor2
 from typing import Optional, Dict, Any
 
 # Default API URL
 DEFAULT_API_URL = "http://localhost:8000"
 
+def _wire_default(value: Any) -> Any:
+    """Serialize values msgpack can't encode natively (e.g. YAML dates) as ISO strings."""
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+# Supported wire formats: (media type, encoder, decoder)
+WIRE_FORMATS = {
+    "yaml": ("application/yaml", yaml.dump, None),
+    "msgpack": ("application/msgpack", partial(msgpack.packb, default=_wire_default),
+                partial(msgpack.unpackb, raw=False)),
+    "cbor": ("application/cbor", partial(cbor2.dumps, timezone=timezone.utc), cbor2.loads),
+}
+
 class KonvaAPI:
     """Client for interacting with the Konva API."""
     
-    def __init__(self, api_url: str = DEFAULT_API_URL):
+    def __init__(self, api_url: str = DEFAULT_API_URL, wire_format: str = "yaml"):
+        if wire_format not in WIRE_FORMATS:
+            raise ValueError(f"Unsupported wire format: {wire_format}")
         self.api_url = api_url
+        self.wire_format = wire_format
+    
+    def _headers(self, with_body: bool = False) -> Dict[str, str]:
+        """Build Content-Type/Accept headers for the configured wire format."""
+        media_type, _, decoder = WIRE_FORMATS[self.wire_format]
+        headers = {}
+        if with_body:
+            headers["Content-Type"] = media_type
+        if decoder is not None:
+            headers["Accept"] = media_type
+        return headers
+    
+    def _encode(self, yaml_data: Dict[str, Any]):
+        """Encode canvas data for the configured wire format."""
+        return WIRE_FORMATS[self.wire_format][1](yaml_data)
+    
+    def _decode(self, response: requests.Response) -> Any:
+        """Decode a response body based on its Content-Type."""
+        response.raise_for_status()
+        content_type = response.headers.get("Content-Type", "").split(";", 1)[0].strip()
+        for media_type, _, decoder in WIRE_FORMATS.values():
+            if decoder is not None and content_type == media_type:
+                return decoder(response.content)
+        return response.json()
     
-    def create_canvas(self, yaml_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Create a new canvas configuration."""
+    def create_canvas(self, yaml_data: Dict[str, Any], echo: bool = True) -> Dict[str, Any]:
+        """Create a new canvas configuration.
+        
+        Pass ``echo=False`` to omit the submitted data from the response.
+        """
         response = requests.post(
             f"{self.api_url}/canvas",
-            data=yaml.dump(yaml_data),
-            headers={"Content-Type": "application/yaml"}
+            data=self._encode(yaml_data),
+            headers=self._headers(with_body=True),
+            params=None if echo else {"echo": "false"}
         )
-        response.raise_for_status()
-        return response.json()
+        return self._decode(response)
     
     def get_canvas(self, canvas_id: str) -> Dict[str, Any]:
         """Get a canvas configuration by ID."""
-        response = requests.get(f"{self.api_url}/canvas/{canvas_id}")
-        response.raise_for_status()
-        return response.json()
+        response = requests.get(f"{self.api_url}/canvas/{canvas_id}", headers=self._headers())
+        return self._decode(response)
     
-    def update_canvas(self, canvas_id: str, yaml_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Update an existing canvas configuration."""
+    def update_canvas(self, canvas_id: str, yaml_data: Dict[str, Any], echo: bool = True) -> Dict[str, Any]:
+        """Update an existing canvas configuration.
+        
+        Pass ``echo=False`` to omit the submitted data from the response.
+        """
         response = requests.put(
             f"{self.api_url}/canvas/{canvas_id}",
-            data=yaml.dump(yaml_data),
-            headers={"Content-Type": "application/yaml"}
+            data=self._encode(yaml_data),
+            headers=self._headers(with_body=True),
+            params=None if echo else {"echo": "false"}
         )
-        response.raise_for_status()
-        return response.json()
+        return self._decode(response)
     
     def delete_canvas(self, canvas_id: str) -> Dict[str, Any]:
         """Delete a canvas configuration."""
-        response = requests.delete(f"{self.api_url}/canvas/{canvas_id}")
-        response.raise_for_status()
-        return response.json()
+        response = requests.delete(f"{self.api_url}/canvas/{canvas_id}", headers=self._headers())
+        return self._decode(response)
     
     def list_canvases(self) -> Dict[str, Any]:
         """List all canvas configurations."""
-        response = requests.get(f"{self.api_url}/canvas")
-        response.raise_for_status()
-        return response.json()
+        response = requests.get(f"{self.api_url}/canvas", headers=self._headers())
+        return self._decode(response)
 
 
 @click.group()
 @click.option('--api-url', default=DEFAULT_API_URL, help='URL of the Konva API.')
+@click.option('--wire-format', type=click.Choice(sorted(WIRE_FORMATS)), default='yaml',
+              help='Encoding used on the wire to talk to the Konva API.')
 @click.pass_context
-def cli(ctx, api_url):
+def cli(ctx, api_url, wire_format):
     """CLI tool for interacting with the Konva API using YAML configurations."""
     ctx.ensure_object(dict)
-    ctx.obj['api'] = KonvaAPI(api_url)
+    ctx.obj['api'] = KonvaAPI(api_url, wire_format)
 
 
 @cli.command()
@@ -145,7 +192,7 @@ def generate_js(ctx, yaml_file, output):
         with open(yaml_file, 'r') as f:
             yaml_data = yaml.safe_load(f)
         
-        result = ctx.obj['api'].create_canvas(yaml_data)
+        result = ctx.obj['api'].create_canvas(yaml_data, echo=False)
         js_code = result.get('jsCode', '')
         
         if output:
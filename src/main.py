@@ -1,12 +1,22 @@
-from fastapi import FastAPI, Request, HTTPException, Path
-from fastapi.responses import JSONResponse
-from fastapi.openapi.utils import get_openapi
+from fastapi import FastAPI, Request, HTTPException, Path, Query
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.encoders import jsonable_encoder
+from datetime import timezone
+from functools import partial
+import io
+import os
 import yaml
 import uuid
 import json
+import msgpack
+import cbor2
 from typing import Dict, List, Any, Optional
 
+# Bundled OpenAPI spec, and the JSON artifact compiled from it at build time
+OPENAPI_SPEC_PATH = os.path.join(os.path.dirname(__file__), "openapi", "konva-v9.2.0.yaml")
+OPENAPI_CACHE_PATH = os.path.splitext(OPENAPI_SPEC_PATH)[0] + ".json"
+
 app = FastAPI()
 
 # Add CORS middleware to allow requests from the web client
@@ -22,11 +32,94 @@ app.add_middleware(
 # In a production app, this would be a database
 canvases: Dict[str, Dict[str, Any]] = {}
 
+# Compact wire formats, negotiated through Content-Type (requests) and
+# Accept (responses). Anything else is treated as YAML in and JSON out.
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+CBOR_MEDIA_TYPE = "application/cbor"
+
+class WireFormatError(ValueError):
+    """Raised when a request body cannot be decoded."""
+
+def _media_type(header_value: Optional[str]) -> str:
+    """Strip parameters (e.g. charset) from a media type header value."""
+    return (header_value or "").split(";", 1)[0].strip().lower()
+
+def _cbor_loads_exact(body: bytes) -> Any:
+    """Decode a single CBOR item, rejecting trailing bytes like msgpack does."""
+    stream = io.BytesIO(body)
+    data = cbor2.CBORDecoder(stream).decode()
+    if stream.read(1):
+        raise WireFormatError("Extra data after CBOR item")
+    return data
+
+def decode_body(body: bytes, content_type: Optional[str]) -> Any:
+    """Decode a canvas request body according to its Content-Type."""
+    media_type = _media_type(content_type)
+    if media_type in MSGPACK_MEDIA_TYPES:
+        loads, errors = partial(msgpack.unpackb, raw=False), (ValueError, msgpack.UnpackException)
+    elif media_type == CBOR_MEDIA_TYPE:
+        loads, errors = _cbor_loads_exact, (ValueError, cbor2.CBORDecodeError)
+    else:
+        loads, errors = yaml.safe_load, (yaml.YAMLError,)
+    try:
+        return loads(body)
+    except errors as e:
+        raise WireFormatError(str(e)) from e
+
+def _accept_q(media_range: str) -> float:
+    """Quality value of one Accept entry (1.0 when absent or malformed)."""
+    for param in media_range.split(";")[1:]:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 1.0
+    return 1.0
+
+def negotiate_media_type(accept: Optional[str]) -> str:
+    """Pick the response media type from Accept, honouring q-values.
+
+    The highest q wins and ties go to the entry listed first. Wildcards and
+    anything unsupported resolve to JSON.
+    """
+    best, best_q = "application/json", 0.0
+    for media_range in (accept or "").split(","):
+        media_type, q = _media_type(media_range), _accept_q(media_range)
+        if q > best_q:
+            if media_type in MSGPACK_MEDIA_TYPES or media_type == CBOR_MEDIA_TYPE:
+                best, best_q = media_type, q
+            elif media_type in ("application/json", "application/*", "*/*"):
+                best, best_q = "application/json", q
+    return best
+
+def _wire_default(value: Any) -> Any:
+    """Serialize values msgpack can't encode natively the same way as JSON."""
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+# The encoding of canvas responses depends on Accept, so caches must key on it
+VARY_ACCEPT = {"Vary": "Accept"}
+
+def encode_response(content: Any, accept: Optional[str]) -> Response:
+    """Encode a response body in the media type negotiated from Accept."""
+    media_type = negotiate_media_type(accept)
+    if media_type in MSGPACK_MEDIA_TYPES:
+        body = msgpack.packb(content, default=_wire_default)
+    elif media_type == CBOR_MEDIA_TYPE:
+        # YAML timestamps are naive; tag them as UTC rather than failing
+        body = cbor2.dumps(content, timezone=timezone.utc)
+    else:
+        return JSONResponse(content=jsonable_encoder(content), headers=VARY_ACCEPT)
+    return Response(content=body, media_type=media_type, headers=VARY_ACCEPT)
+
 @app.post("/canvas")
-async def create_canvas(request: Request):
-    yaml_body = await request.body()
+async def create_canvas(
+    request: Request,
+    echo: bool = Query(True, description="Include the submitted canvas data in the response")
+):
+    body = await request.body()
     try:
-        data = yaml.safe_load(yaml_body)
+        data = decode_body(body, request.headers.get("content-type"))
         # Generate a unique ID for the canvas
         canvas_id = str(uuid.uuid4())
         canvases[canvas_id] = data
@@ -34,16 +127,18 @@ async def create_canvas(request: Request):
         # Generate actual executable JavaScript for Konva.js
         js_code = generate_konva_js(data)
         
-        return {
+        result = {
             "id": canvas_id,
-            "jsCode": js_code,
-            "data": data
+            "jsCode": js_code
         }
-    except yaml.YAMLError as e:
-        return JSONResponse(status_code=400, content={"error": str(e)})
+        if echo:
+            result["data"] = data
+        return encode_response(result, request.headers.get("accept"))
+    except WireFormatError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)}, headers=VARY_ACCEPT)
 
 @app.get("/canvas")
-async def list_canvases():
+async def list_canvases(request: Request):
     """List all canvas configurations."""
     result = []
     for canvas_id, data in canvases.items():
@@ -51,69 +146,98 @@ async def list_canvases():
             "id": canvas_id,
             "data": data
         })
-    return result
+    return encode_response(result, request.headers.get("accept"))
 
 @app.get("/canvas/{canvas_id}")
-async def get_canvas(canvas_id: str = Path(..., description="The ID of the canvas to retrieve")):
+async def get_canvas(
+    request: Request,
+    canvas_id: str = Path(..., description="The ID of the canvas to retrieve")
+):
     """Get a specific canvas configuration by ID."""
     if canvas_id not in canvases:
-        raise HTTPException(status_code=404, detail="Canvas not found")
+        raise HTTPException(status_code=404, detail="Canvas not found", headers=VARY_ACCEPT)
     
-    return {
+    return encode_response({
         "id": canvas_id,
         "data": canvases[canvas_id]
-    }
+    }, request.headers.get("accept"))
 
 @app.put("/canvas/{canvas_id}")
 async def update_canvas(
     request: Request,
-    canvas_id: str = Path(..., description="The ID of the canvas to update")
+    canvas_id: str = Path(..., description="The ID of the canvas to update"),
+    echo: bool = Query(True, description="Include the submitted canvas data in the response")
 ):
     """Update an existing canvas configuration."""
     if canvas_id not in canvases:
-        raise HTTPException(status_code=404, detail="Canvas not found")
+        raise HTTPException(status_code=404, detail="Canvas not found", headers=VARY_ACCEPT)
     
-    yaml_body = await request.body()
+    body = await request.body()
     try:
-        data = yaml.safe_load(yaml_body)
+        data = decode_body(body, request.headers.get("content-type"))
         canvases[canvas_id] = data
         
         # Generate actual executable JavaScript for Konva.js
         js_code = generate_konva_js(data)
         
-        return {
+        result = {
             "id": canvas_id,
-            "jsCode": js_code,
-            "data": data
+            "jsCode": js_code
         }
-    except yaml.YAMLError as e:
-        return JSONResponse(status_code=400, content={"error": str(e)})
+        if echo:
+            result["data"] = data
+        return encode_response(result, request.headers.get("accept"))
+    except WireFormatError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)}, headers=VARY_ACCEPT)
 
 @app.delete("/canvas/{canvas_id}")
-async def delete_canvas(canvas_id: str = Path(..., description="The ID of the canvas to delete")):
+async def delete_canvas(
+    request: Request,
+    canvas_id: str = Path(..., description="The ID of the canvas to delete")
+):
     """Delete a canvas configuration."""
     if canvas_id not in canvases:
-        raise HTTPException(status_code=404, detail="Canvas not found")
+        raise HTTPException(status_code=404, detail="Canvas not found", headers=VARY_ACCEPT)
     
     deleted_data = canvases.pop(canvas_id)
     
-    return {
+    return encode_response({
         "id": canvas_id,
         "message": "Canvas deleted successfully",
         "data": deleted_data
-    }
+    }, request.headers.get("accept"))
+
+def compile_openapi_spec(spec_path: str = OPENAPI_SPEC_PATH, cache_path: str = OPENAPI_CACHE_PATH) -> str:
+    """Compile the bundled YAML spec into the JSON artifact served at runtime.
+
+    Run at build time (see Dockerfile) so serving /openapi.json never parses YAML.
+    """
+    with open(spec_path, "r") as f:
+        spec = yaml.safe_load(f)
+    with open(cache_path, "w") as f:
+        json.dump(spec, f, separators=(",", ":"))
+    return cache_path
 
-# Override OpenAPI schema
+def load_openapi_spec(spec_path: str = OPENAPI_SPEC_PATH, cache_path: str = OPENAPI_CACHE_PATH) -> Dict[str, Any]:
+    """Load the bundled OpenAPI spec, preferring the compiled JSON artifact.
+
+    The YAML source is parsed instead when the artifact is missing or older
+    than the spec, so a stale artifact never gets served.
+    """
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(spec_path):
+        with open(cache_path, "r") as f:
+            return json.load(f)
+    with open(spec_path, "r") as f:
+        return yaml.safe_load(f)
+
+# Override OpenAPI schema with the bundled spec
 def custom_openapi():
     if app.openapi_schema:
         return app.openapi_schema
     
-    openapi_schema = get_openapi(
-        title="KonvaJS Canvas API",
-        version="konva/v9.2.0",
-        routes=app.routes,
-    )
-    
+    openapi_schema = load_openapi_spec()
+    # The bundled spec names the hosted API; /docs should call this server
+    openapi_schema["servers"] = [{"url": "/"}]
     app.openapi_schema = openapi_schema
     return app.openapi_schema
 
@@ -1,6 +1,9 @@
 import pytest
 import json
 import yaml
+import msgpack
+import cbor2
+from datetime import date, datetime, timezone
 from unittest.mock import patch, MagicMock
 from click.testing import CliRunner
 from cli.konva_cli import cli, KonvaAPI
@@ -168,3 +171,44 @@ def test_api_error_handling(runner, mock_api, tmp_path):
     # Check the results
     assert result.exit_code == 1
     assert "Error creating canvas: API error" in result.output
+
+def test_api_msgpack_wire_format():
+    """Test that KonvaAPI encodes requests and decodes responses as MessagePack."""
+    test_data = {"type": "rect", "width": 100, "height": 50}
+    response = MagicMock()
+    response.headers = {"Content-Type": "application/msgpack"}
+    response.content = msgpack.packb({"id": "test-id", "jsCode": "// JS code"})
+    
+    with patch('cli.konva_cli.requests.post', return_value=response) as post:
+        api = KonvaAPI("http://api", wire_format="msgpack")
+        result = api.create_canvas(test_data, echo=False)
+    
+    assert result == {"id": "test-id", "jsCode": "// JS code"}
+    args, kwargs = post.call_args
+    assert args == ("http://api/canvas",)
+    assert msgpack.unpackb(kwargs["data"], raw=False) == test_data
+    assert kwargs["headers"] == {"Content-Type": "application/msgpack", "Accept": "application/msgpack"}
+    assert kwargs["params"] == {"echo": "false"}
+
+def test_api_invalid_wire_format():
+    """Test that KonvaAPI rejects unknown wire formats."""
+    with pytest.raises(ValueError):
+        KonvaAPI(wire_format="xml")
+
+def test_api_compact_wire_formats_encode_dates():
+    """Test that YAML dates survive MessagePack and CBOR request encoding."""
+    test_data = yaml.safe_load("created: 2024-01-01\nupdated: 2024-01-01 10:00:00\n")
+    response = MagicMock()
+    response.headers = {"Content-Type": "application/json"}
+    response.json.return_value = {"id": "test-id"}
+    
+    with patch('cli.konva_cli.requests.post', return_value=response) as post:
+        KonvaAPI(wire_format="msgpack").create_canvas(test_data)
+    sent = msgpack.unpackb(post.call_args.kwargs["data"], raw=False)
+    assert sent == {"created": "2024-01-01", "updated": "2024-01-01T10:00:00"}
+    
+    with patch('cli.konva_cli.requests.post', return_value=response) as post:
+        KonvaAPI(wire_format="cbor").create_canvas(test_data)
+    sent = cbor2.loads(post.call_args.kwargs["data"])
+    assert sent["created"] == date(2024, 1, 1)
+    assert sent["updated"] == datetime(2024, 1, 1, 10, tzinfo=timezone.utc)
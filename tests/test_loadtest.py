@@ -0,0 +1,118 @@
+import asyncio
+import json
+import random
+import httpx
+import pytest
+from unittest.mock import patch, AsyncMock
+from click.testing import CliRunner
+from benchmarks.loadtest import LoadStats, main, parse_mix, percentile, route_label, run_synthetic
+
+@pytest.fixture
+def runner():
+    """Create a CLI runner for testing."""
+    return CliRunner()
+
+def test_parse_mix():
+    """Test parsing a request mix."""
+    assert parse_mix("create=1,get=3") == {"create": 1.0, "get": 3.0}
+    with pytest.raises(ValueError):
+        parse_mix("patch=1")
+    with pytest.raises(ValueError):
+        parse_mix("create=0")
+
+def test_route_label():
+    """Test that concrete paths collapse into route templates."""
+    assert route_label("get", "/canvas") == "GET /canvas"
+    assert route_label("PUT", "/canvas/abc-123?echo=false") == "PUT /canvas/{id}"
+
+def test_percentile():
+    """Test nearest-rank percentiles."""
+    samples = list(range(1, 1001))
+    assert percentile(samples, 50) == 500
+    assert percentile(samples, 99) == 990
+    assert percentile(samples, 99.9) == 999
+
+def test_synthetic_run_and_replay(runner, tmp_path):
+    """Test a small synthetic run, then replaying the traffic it recorded."""
+    log_file = tmp_path / "traffic.jsonl"
+    result_file = tmp_path / "results.json"
+    result = runner.invoke(main, [
+        '--requests', '40', '--concurrency', '8', '--size-median', '300', '--pool', '2',
+        '--record', str(log_file), '--json-output', str(result_file)
+    ])
+    assert result.exit_code == 0, result.output
+    assert "throughput" in result.output
+    
+    summary = json.loads(result_file.read_text())
+    assert summary["requests"] == 40
+    assert summary["rss"] and all(sample["rss_bytes"] > 0 for sample in summary["rss"])
+    assert all(route["errors"] == 0 for route in summary["routes"].values())
+    # Requests really overlap against the server
+    assert summary["peak_in_flight"] > 1
+    
+    entries = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert len(entries) == 40
+    assert [entry["offset"] for entry in entries] == sorted(entry["offset"] for entry in entries)
+    
+    # Recorded canvas IDs are mapped to the replayed ones, so nothing 404s
+    result = runner.invoke(main, ['--replay', str(log_file), '--concurrency', '1',
+                                  '--json-output', str(result_file)])
+    assert result.exit_code == 0, result.output
+    summary = json.loads(result_file.read_text())
+    assert summary["requests"] == 40
+    assert all(route["errors"] == 0 for route in summary["routes"].values())
+
+def test_replay_maps_ids_from_compact_responses(runner, tmp_path):
+    """Test that canvas IDs are mapped when the create response is MessagePack."""
+    log_file = tmp_path / "traffic.jsonl"
+    result_file = tmp_path / "results.json"
+    entries = [
+        {"offset": 0, "method": "POST", "path": "/canvas", "body": "stage: {width: 10}\n",
+         "headers": {"Content-Type": "application/yaml", "Accept": "application/msgpack"}, "id": "recorded-id"},
+        {"offset": 0, "method": "GET", "path": "/canvas/recorded-id"},
+        {"offset": 0, "method": "DELETE", "path": "/canvas/recorded-id"},
+    ]
+    log_file.write_text("".join(json.dumps(entry) + "\n" for entry in entries))
+    
+    result = runner.invoke(main, ['--replay', str(log_file), '--concurrency', '4',
+                                  '--json-output', str(result_file)])
+    assert result.exit_code == 0, result.output
+    summary = json.loads(result_file.read_text())
+    assert summary["routes"]["GET /canvas/{id}"]["errors"] == 0
+
+def test_duration_is_not_capped_by_default_request_count(runner):
+    """Test that --duration alone leaves the request count unbounded."""
+    with patch('benchmarks.loadtest.run_synthetic', new_callable=AsyncMock) as run_synthetic:
+        result = runner.invoke(main, ['--duration', '300', '--pool', '1', '--size-median', '100'])
+    assert result.exit_code == 0, result.output
+    args = run_synthetic.call_args.args
+    assert args[1] is None
+    assert args[2] == 300
+    
+    with patch('benchmarks.loadtest.run_synthetic', new_callable=AsyncMock) as run_synthetic:
+        result = runner.invoke(main, ['--pool', '1', '--size-median', '100'])
+    assert run_synthetic.call_args.args[1] == 1000
+
+def test_transport_errors_are_counted_not_fatal():
+    """Test that a reset connection counts as an error instead of ending the run."""
+    calls = 0
+    
+    def handler(request):
+        nonlocal calls
+        calls += 1
+        if calls % 3 == 0:
+            raise httpx.ReadError("connection reset", request=request)
+        if request.method == "POST":
+            return httpx.Response(200, json={"id": f"id-{calls}", "jsCode": ""})
+        return httpx.Response(200, json={})
+    
+    async def run():
+        stats = LoadStats()
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://konva") as client:
+            await run_synthetic(client, 30, None, 4, {"create": 1, "get": 1}, [b"stage: {}"],
+                                random.Random(0), True, stats)
+        return stats.summary()
+    
+    summary = asyncio.run(run())
+    assert summary["requests"] == 30
+    assert sum(route["errors"] for route in summary["routes"].values()) == 10
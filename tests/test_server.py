@@ -1,7 +1,11 @@
+import os
 import pytest
+from fastapi.routing import APIRoute
 from fastapi.testclient import TestClient
 import yaml
-from src.main import app, canvases
+import msgpack
+import cbor2
+from src.main import app, canvases, compile_openapi_spec, load_openapi_spec, OPENAPI_SPEC_PATH
 
 client = TestClient(app)
 
@@ -177,3 +181,194 @@ def test_custom_openapi():
     assert "info" in data, "OpenAPI schema missing info object"
     assert data["info"]["title"] == "KonvaJS Canvas API"
     assert data["info"]["version"] == "konva/v9.2.0"
+
+def test_create_canvas_without_echo():
+    """Test that echo=false drops the submitted data from the response."""
+    test_data = {"type": "rect", "width": 100, "height": 50}
+    response = client.post(
+        "/canvas?echo=false",
+        content=yaml.dump(test_data),
+        headers={"Content-Type": "application/yaml"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert "data" not in data
+    assert "jsCode" in data
+    assert canvases[data["id"]] == test_data
+
+def test_update_canvas_without_echo():
+    """Test that echo=false drops the submitted data from the update response."""
+    create_response = client.post(
+        "/canvas",
+        content=yaml.dump({"type": "rect", "width": 100}),
+        headers={"Content-Type": "application/yaml"}
+    )
+    canvas_id = create_response.json()["id"]
+    
+    updated_data = {"type": "rect", "width": 200}
+    response = client.put(
+        f"/canvas/{canvas_id}?echo=false",
+        content=yaml.dump(updated_data),
+        headers={"Content-Type": "application/yaml"}
+    )
+    assert response.status_code == 200
+    assert "data" not in response.json()
+    assert canvases[canvas_id] == updated_data
+
+def test_create_canvas_msgpack():
+    """Test creating a canvas with a MessagePack request and response."""
+    test_data = {"stage": {"width": 400, "height": 300}, "layers": []}
+    response = client.post(
+        "/canvas",
+        content=msgpack.packb(test_data),
+        headers={"Content-Type": "application/msgpack", "Accept": "application/msgpack"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    data = msgpack.unpackb(response.content, raw=False)
+    assert data["data"] == test_data
+    assert "width: 400" in data["jsCode"]
+
+def test_get_canvas_cbor():
+    """Test creating a canvas with CBOR and reading it back as CBOR."""
+    test_data = {"type": "circle", "radius": 30}
+    create_response = client.post(
+        "/canvas",
+        content=cbor2.dumps(test_data),
+        headers={"Content-Type": "application/cbor"}
+    )
+    assert create_response.status_code == 200
+    canvas_id = create_response.json()["id"]
+    
+    response = client.get(f"/canvas/{canvas_id}", headers={"Accept": "application/cbor"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/cbor"
+    assert cbor2.loads(response.content)["data"] == test_data
+
+def test_create_canvas_invalid_msgpack():
+    """Test creating a canvas with a malformed MessagePack body."""
+    response = client.post(
+        "/canvas",
+        content=b"\xc1",
+        headers={"Content-Type": "application/msgpack"}
+    )
+    assert response.status_code == 400
+    assert "error" in response.json()
+
+def test_openapi_serves_bundled_spec():
+    """Test that /openapi.json serves the bundled spec rather than a generated one."""
+    with open(OPENAPI_SPEC_PATH, "r") as f:
+        bundled = yaml.safe_load(f)
+    response = client.get("/openapi.json")
+    assert response.status_code == 200
+    served = response.json()
+    # Swagger UI must call the running server, not the hosted API
+    assert served.pop("servers") == [{"url": "/"}]
+    bundled.pop("servers", None)
+    assert served == bundled
+
+def test_load_openapi_spec_prefers_compiled_artifact(tmp_path):
+    """Test that the compiled JSON artifact is used unless it is stale."""
+    spec_path = tmp_path / "spec.yaml"
+    cache_path = tmp_path / "spec.json"
+    spec_path.write_text(yaml.dump({"openapi": "3.1.0", "info": {"title": "v1"}}))
+    compile_openapi_spec(str(spec_path), str(cache_path))
+    
+    # Only the artifact changes: it is up to date, so it is served
+    cache_path.write_text('{"info": {"title": "compiled"}}')
+    assert load_openapi_spec(str(spec_path), str(cache_path))["info"]["title"] == "compiled"
+    
+    # The spec is newer than the artifact: fall back to the YAML source
+    os.utime(cache_path, (0, 0))
+    assert load_openapi_spec(str(spec_path), str(cache_path))["info"]["title"] == "v1"
+
+def test_cbor_response_with_yaml_timestamp():
+    """Test that YAML timestamps don't break CBOR responses."""
+    create_response = client.post(
+        "/canvas",
+        content="created: 2024-01-01 10:00:00\nstage: {width: 100}\n",
+        headers={"Content-Type": "application/yaml", "Accept": "application/cbor"}
+    )
+    assert create_response.status_code == 200
+    data = cbor2.loads(create_response.content)
+    assert data["data"]["created"].year == 2024
+    
+    response = client.get("/canvas", headers={"Accept": "application/cbor"})
+    assert response.status_code == 200
+    
+    # msgpack and JSON render the timestamp the same way
+    response = client.get(f"/canvas/{data['id']}", headers={"Accept": "application/msgpack"})
+    assert msgpack.unpackb(response.content, raw=False)["data"]["created"] == "2024-01-01T10:00:00"
+    assert client.get(f"/canvas/{data['id']}").json()["data"]["created"] == "2024-01-01T10:00:00"
+
+def test_accept_honours_q_values():
+    """Test that Accept q-values decide the response encoding."""
+    create_response = client.post(
+        "/canvas",
+        content=yaml.dump({"type": "rect"}),
+        headers={"Content-Type": "application/yaml"}
+    )
+    canvas_id = create_response.json()["id"]
+    
+    response = client.get(
+        f"/canvas/{canvas_id}",
+        headers={"Accept": "application/msgpack;q=0.1, application/json"}
+    )
+    assert response.headers["content-type"] == "application/json"
+    
+    response = client.get(
+        f"/canvas/{canvas_id}",
+        headers={"Accept": "application/json;q=0.5, application/cbor"}
+    )
+    assert response.headers["content-type"] == "application/cbor"
+
+def test_canvas_responses_vary_on_accept():
+    """Test that every canvas response carries Vary: Accept."""
+    create_response = client.post(
+        "/canvas",
+        content=yaml.dump({"type": "rect"}),
+        headers={"Content-Type": "application/yaml"}
+    )
+    canvas_id = create_response.json()["id"]
+    responses = [
+        create_response,
+        client.get("/canvas"),
+        client.get(f"/canvas/{canvas_id}", headers={"Accept": "application/msgpack"}),
+        client.get("/canvas/nonexistent-id"),
+        client.post("/canvas", content="invalid: yaml: content: - [",
+                    headers={"Content-Type": "application/yaml"}),
+        client.delete(f"/canvas/{canvas_id}"),
+    ]
+    for response in responses:
+        assert "Accept" in response.headers["vary"]
+
+def test_openapi_documents_every_route():
+    """Test that every app route and method appears in the served spec."""
+    paths = client.get("/openapi.json").json()["paths"]
+    for route in app.routes:
+        if not isinstance(route, APIRoute) or not route.include_in_schema:
+            continue
+        assert route.path in paths, f"{route.path} missing from OpenAPI spec"
+        for method in route.methods:
+            assert method.lower() in paths[route.path], f"{method} {route.path} missing from OpenAPI spec"
+
+def test_openapi_documents_wire_formats_and_echo():
+    """Test that the echo parameter and compact media types are documented."""
+    spec = client.get("/openapi.json").json()
+    components = spec["components"]
+    assert {"application/yaml", "application/msgpack", "application/cbor"} <= set(
+        components["requestBodies"]["CanvasSpec"]["content"])
+    assert {"application/json", "application/msgpack", "application/cbor"} <= set(
+        components["responses"]["CanvasRendered"]["content"])
+    for operation in (spec["paths"]["/canvas"]["post"], spec["paths"]["/canvas/{canvas_id}"]["put"]):
+        assert {"$ref": "#/components/parameters/Echo"} in operation["parameters"]
+
+def test_create_canvas_cbor_trailing_bytes():
+    """Test that CBOR bodies with trailing bytes are rejected."""
+    response = client.post(
+        "/canvas",
+        content=cbor2.dumps({"stage": {}}) + b"\x00",
+        headers={"Content-Type": "application/cbor"}
+    )
+    assert response.status_code == 400
+    assert "error" in response.json()